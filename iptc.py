@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import os
+from struct import pack, unpack
+
+# Minimal JPEG APP13 (Photoshop 3.0 / IPTC IIM) segment handling for the
+# submission workflow. Only the APP13 segment ever changes when a photo's
+# metadata is edited, so instead of rewriting the whole JPEG (what
+# iptcinfo3.save_as does) we build the few hundred bytes of IPTC ourselves
+# and patch them into the file, overwriting in place when the segment length
+# is unchanged.
+
+SOI = b"\xff\xd8"
+APP13_MARKER = b"\xff\xed"
+
+_PS_HEADER = b"Photoshop 3.0\x00"
+_IIM_RESOURCE = b"8BIM\x04\x04"
+_UTF8_ESCAPE = b"\x1b%G"
+
+# IIM record 2 datasets used by the submission form. 'object name' shows up
+# as Title and 'caption/abstract' as Description in Photoshop/Lightroom
+# (see test_extract.py).
+DS_OBJECT_NAME = 5
+DS_SOURCE = 115
+DS_CAPTION = 120
+
+# Markers that may legally precede APP13; anything else ends the scan.
+_APP_MARKERS = frozenset(range(0xE0, 0xF0))
+_SOS = 0xDA
+
+# The segment length is a 16-bit field that covers the two length bytes, the
+# Photoshop preamble, the 8BIM resource header, and the IIM payload plus its
+# possible pad byte — which caps the IIM data itself at this many bytes.
+_IIM_LIMIT = 0xFFFF - 2 - len(_PS_HEADER) - len(_IIM_RESOURCE) - 2 - 4 - 1
+
+
+def build_app13_segment(
+    title: str | None,
+    description: str | None,
+    submitted_by: str | None,
+) -> bytes:
+    """Build a complete APP13 segment (marker and length included) carrying
+    the given fields as IPTC IIM record 2 datasets, encoded as UTF-8."""
+    iim = bytearray()
+    # Record 1:90 declares the character set, record 2:0 the IIM version.
+    iim += pack("!BBBH", 0x1C, 1, 90, len(_UTF8_ESCAPE)) + _UTF8_ESCAPE
+    iim += pack("!BBBHH", 0x1C, 2, 0, 2, 4)
+    for dataset, value in (
+        (DS_OBJECT_NAME, title),
+        (DS_CAPTION, description),
+        (DS_SOURCE, submitted_by),
+    ):
+        if not value:
+            continue
+        # Bound each dataset by its own 15-bit length field and by what's
+        # left of the segment budget, so the !H length pack below can't
+        # overflow no matter how much text the form submits.
+        room = _IIM_LIMIT - len(iim) - 5  # 5-byte dataset header
+        if room <= 0:
+            break
+        data = value.encode("utf-8")[: min(0x7FFF, room)]
+        iim += pack("!BBBH", 0x1C, 2, dataset, len(data))
+        iim += data
+
+    resource = bytearray(_PS_HEADER)
+    resource += _IIM_RESOURCE
+    resource += b"\x00\x00"  # empty resource name, padded to even length
+    resource += pack("!L", len(iim))
+    resource += iim
+    if len(iim) % 2:
+        resource += b"\x00"
+    return APP13_MARKER + pack("!H", len(resource) + 2) + bytes(resource)
+
+
+def _other_resources(data: bytes) -> bytes:
+    """Return the non-IIM 8BIM resource blocks from an APP13 segment body
+    (the bytes after the marker and length), verbatim and padding included.
+    Cameras and editors park other things next to the IPTC data — the IPTC
+    digest, resolution info, a preview thumbnail — and those must survive a
+    rebuild, the same way iptcinfo3's collect_adobe_parts keeps them."""
+    out = bytearray()
+    pos = len(_PS_HEADER)
+    end = len(data)
+    while pos + 10 <= end:
+        start = pos
+        if data[pos : pos + 4] != b"8BIM":
+            break
+        resource_id = data[pos + 4 : pos + 6]
+        pos += 6
+        # Pascal-style name, padded so the length byte plus name is even.
+        name_len = data[pos]
+        pos += 1 + name_len + (1 + name_len) % 2
+        if pos + 4 > end:
+            break
+        size = unpack("!L", data[pos : pos + 4])[0]
+        pos += 4 + size + size % 2
+        if pos > end:
+            break
+        if resource_id != b"\x04\x04":
+            out += data[start:pos]
+    return bytes(out)
+
+
+def _merge_resources(segment: bytes, others: bytes) -> bytes:
+    """Append preserved resource blocks after the IIM resource of a freshly
+    built APP13 segment, recomputing the segment length. If the extras would
+    push the length past the 16-bit segment limit they are dropped rather
+    than corrupting the marker stream."""
+    if not others:
+        return segment
+    length = len(segment) - 2 + len(others)
+    if length > 0xFFFF:
+        return segment
+    return APP13_MARKER + pack("!H", length) + segment[4:] + others
+
+
+def splice_buffer(buf: bytes, segment: bytes) -> tuple[bytes, tuple[int, int]] | None:
+    """Splice a built APP13 segment into an in-memory JPEG prefix, replacing
+    any existing APP13 it contains while keeping that segment's non-IIM
+    Photoshop resources. Returns (new_prefix, (offset, length)), or None
+    when buf is not a JPEG or the decision can't be made from the bytes
+    available (e.g. an existing APP13 extends past the buffer)."""
+    if buf[:2] != SOI:
+        return None
+    pos = 2
+    insert_at = 2
+    saw_scan_start = False
+    while pos + 4 <= len(buf):
+        if buf[pos] != 0xFF:
+            return None
+        marker = buf[pos + 1]
+        if marker == _SOS:
+            saw_scan_start = True
+            break
+        seg_len = 2 + unpack("!H", buf[pos + 2 : pos + 4])[0]
+        if marker == 0xED and buf[pos + 4 : pos + 4 + len(_PS_HEADER)] == _PS_HEADER:
+            if pos + seg_len > len(buf):
+                return None
+            merged = _merge_resources(
+                segment, _other_resources(buf[pos + 4 : pos + seg_len])
+            )
+            return buf[:pos] + merged + buf[pos + seg_len :], (pos, len(merged))
+        if marker in (0xE0, 0xE1):
+            insert_at = pos + seg_len
+        pos += seg_len
+    if not saw_scan_start:
+        # Buffer ended before the scan data; an APP13 could still follow.
+        return None
+    return buf[:insert_at] + segment + buf[insert_at:], (insert_at, len(segment))
+
+
+def _scan_segments(fh) -> tuple[tuple[int, int] | None, int]:
+    """Walk the marker stream and return ((app13_offset, app13_length) or
+    None, insertion_offset). The insertion offset sits after any APP0/APP1
+    segments so EXIF/JFIF stay first, as other writers expect."""
+    fh.seek(0)
+    if fh.read(2) != SOI:
+        raise ValueError("not a JPEG")
+    pos = 2
+    insert_at = 2
+    while True:
+        fh.seek(pos)
+        header = fh.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            break
+        marker = header[1]
+        if marker == _SOS:
+            break
+        seg_len = 2 + unpack("!H", header[2:4])[0]
+        if marker == 0xED and fh.read(len(_PS_HEADER)) == _PS_HEADER:
+            return (pos, seg_len), insert_at
+        if marker in (0xE0, 0xE1):
+            insert_at = pos + seg_len
+        pos += seg_len
+    return None, insert_at
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    """Append count bytes from src_fd at offset to dst_fd without staging
+    them in user space. Prefers copy_file_range, then sendfile, then a plain
+    pread/write loop for platforms and filesystems that support neither."""
+    try:
+        while count > 0:
+            n = os.copy_file_range(src_fd, dst_fd, count, offset_src=offset)
+            if n == 0:
+                break
+            offset += n
+            count -= n
+    except (AttributeError, OSError):
+        pass
+    try:
+        while count > 0:
+            n = os.sendfile(dst_fd, src_fd, offset, count)
+            if n == 0:
+                break
+            offset += n
+            count -= n
+    except (AttributeError, OSError):
+        pass
+    while count > 0:
+        chunk = os.pread(src_fd, min(count, 1 << 20), offset)
+        if not chunk:
+            raise OSError(f"short read at offset {offset} while copying")
+        os.write(dst_fd, chunk)
+        offset += len(chunk)
+        count -= len(chunk)
+
+
+def patch_file(
+    path: str | os.PathLike,
+    title: str | None,
+    description: str | None,
+    submitted_by: str | None,
+    offset: int | None = None,
+    length: int | None = None,
+) -> tuple[int, int] | None:
+    """Write the given fields into the file's APP13 segment, reusing a cached
+    (offset, length) location when it still matches. Returns the new
+    (offset, length) for caching, or None if the file is not a JPEG."""
+    segment = build_app13_segment(title, description, submitted_by)
+    with open(path, "r+b") as fh:
+        existing = None
+        insert_at = None
+        if offset is not None and length is not None:
+            fh.seek(offset)
+            header = fh.read(4)
+            if (
+                header[:2] == APP13_MARKER
+                and len(header) == 4
+                and 2 + unpack("!H", header[2:])[0] == length
+            ):
+                existing = (offset, length)
+        if existing is None:
+            try:
+                existing, insert_at = _scan_segments(fh)
+            except ValueError:
+                return None
+
+        if existing:
+            # Replacing a segment: carry its other 8BIM resources over into
+            # the rebuilt one so only the IIM data actually changes.
+            body = os.pread(fh.fileno(), existing[1] - 4, existing[0] + 4)
+            segment = _merge_resources(segment, _other_resources(body))
+
+        if existing and existing[1] == len(segment):
+            # Same-size segment: overwrite in place, touching only O(KB).
+            os.pwrite(fh.fileno(), segment, existing[0])
+            return existing[0], len(segment)
+
+        # Length changed (or no APP13 yet): splice the new segment and keep
+        # every other byte of the file as-is. The unchanged head and tail are
+        # copied fd-to-fd so the image body never round-trips through Python.
+        if existing:
+            head_len, tail_start = existing[0], existing[0] + existing[1]
+        else:
+            head_len = tail_start = insert_at
+        size = os.fstat(fh.fileno()).st_size
+        tmp_path = os.fspath(path) + ".tmp"
+        with open(tmp_path, "wb", buffering=0) as out:
+            _copy_range(fh.fileno(), out.fileno(), 0, head_len)
+            out.write(segment)
+            _copy_range(fh.fileno(), out.fileno(), tail_start, size - tail_start)
+    os.replace(tmp_path, path)
+    return head_len, len(segment)
@@ -1,84 +1,241 @@
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from functools import lru_cache
+import hashlib
+from html import escape
 import os
 from pathlib import Path
+import queue
+import threading
 from uuid import uuid4
 from zoneinfo import ZoneInfo
 
 import sqlite3
-from iptcinfo3 import IPTCInfo
+from PIL import Image
 from starlette.datastructures import UploadFile
 from starlette.requests import Request
 from starlette.responses import FileResponse, RedirectResponse
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
 
-from fasthtml.common import *
+from fasthtml.common import (
+    Button,
+    Div,
+    Fieldset,
+    Form,
+    H2,
+    Img,
+    Input,
+    Label,
+    NotStr,
+    P,
+    Script,
+    Strong,
+    Style,
+    Table,
+    Tbody,
+    Td,
+    Textarea,
+    Th,
+    Thead,
+    Titled,
+    Tr,
+    fast_app,
+    serve,
+    to_xml,
+)
+
+import iptc
 
 APP_TITLE = "McCallie Family Archive Photo Submission"
 DATA_DIR = Path("data")
 IMAGE_DIR = DATA_DIR / "images"
+IMAGE_DIR_STR = str(IMAGE_DIR)
+THUMB_DIR = IMAGE_DIR / "thumbs"
+THUMB_DIR_STR = str(THUMB_DIR)
+# Longest edge of the WebP thumbnails shown in the submissions table.
+THUMB_SIZE = 512
 DB_PATH = DATA_DIR / "submissions.db"
 
+# Uploads are not fsynced by default: the first write is immediately rewritten
+# by the IPTC save, so forcing it to disk only stalls the request on a disk
+# barrier. Set DURABLE_UPLOADS=1 to fsync the final image file before the
+# submission is recorded, at the cost of extra latency per upload.
+DURABLE_UPLOADS = bool(os.environ.get("DURABLE_UPLOADS"))
+
+# Chunk size for streaming uploads from the request body to disk.
+UPLOAD_CHUNK = 1 << 20
+
+# Blocking file work (IPTC patching) runs here instead of on the event loop
+# thread, so one slow disk doesn't stall unrelated requests.
+_IO_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Serializes concurrent IPTC writes to the same image file.
+_file_locks: dict[str, asyncio.Lock] = {}
+
+
+def _file_lock(path: str) -> asyncio.Lock:
+    lock = _file_locks.get(path)
+    if lock is None:
+        lock = _file_locks[path] = asyncio.Lock()
+    return lock
+
+
+# Connections are opened once at startup and reused: a single writer guarded by
+# a lock plus a small pool of read-only connections, so the hot read paths never
+# pay the per-request open/close syscalls on the db file and its WAL siblings.
+READER_COUNT = 4
+
+_ro_pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+_rw_conn: sqlite3.Connection | None = None
+_rw_lock = threading.Lock()
+
+
+def _connect(*, readonly: bool) -> sqlite3.Connection:
+    if readonly:
+        conn = sqlite3.connect(
+            f"file:{DB_PATH}?mode=ro&cache=shared", uri=True, check_same_thread=False
+        )
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    # Memory-mapped reads keep the covering scans off the syscall path.
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.row_factory = sqlite3.Row
+    return conn
+
 
 def init_db() -> None:
+    global _rw_conn
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     IMAGE_DIR.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS submissions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                image_path TEXT NOT NULL,
-                title TEXT,
-                description TEXT,
-                submitted_by TEXT,
-                approximate_date TEXT,
-                created_at TEXT NOT NULL
-            )
-            """
+    THUMB_DIR.mkdir(parents=True, exist_ok=True)
+    _rw_conn = _connect(readonly=False)
+    _rw_conn.execute("PRAGMA journal_mode=WAL")
+    _rw_conn.execute("PRAGMA synchronous=NORMAL")
+    _rw_conn.execute("PRAGMA temp_store=MEMORY")
+    _rw_conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            image_path TEXT NOT NULL,
+            title TEXT,
+            description TEXT,
+            submitted_by TEXT,
+            approximate_date TEXT,
+            created_at TEXT NOT NULL,
+            iptc_offset INTEGER,
+            iptc_len INTEGER,
+            content_hash TEXT,
+            thumb_path TEXT
         )
+        """
+    )
+    # Databases created before the in-place IPTC patcher / dedupe work lack
+    # the newer columns.
+    cols = {r[1] for r in _rw_conn.execute("PRAGMA table_info(submissions)")}
+    for col, coltype in (
+        ("iptc_offset", "INTEGER"),
+        ("iptc_len", "INTEGER"),
+        ("content_hash", "TEXT"),
+        ("thumb_path", "TEXT"),
+    ):
+        if col not in cols:
+            _rw_conn.execute(f"ALTER TABLE submissions ADD COLUMN {col} {coltype}")
+    _rw_conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_hash ON submissions(content_hash)"
+    )
+    _rw_conn.commit()
+    for _ in range(READER_COUNT):
+        _ro_pool.put(_connect(readonly=True))
 
 
-def db_rows() -> list[sqlite3.Row]:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    rows = conn.execute(
-        """
-        SELECT id, image_path, title, description, submitted_by, approximate_date, created_at
-        FROM submissions
-        ORDER BY id DESC
-        """
-    ).fetchall()
-    conn.close()
-    return rows
+@contextmanager
+def _borrow_reader():
+    conn = _ro_pool.get()
+    try:
+        yield conn
+    finally:
+        _ro_pool.put(conn)
+
+
+@contextmanager
+def _borrow_writer():
+    with _rw_lock:
+        assert _rw_conn is not None
+        with _rw_conn:
+            yield _rw_conn
+
 
+# Rows rendered per table page; further pages load as the last row scrolls
+# into view.
+PAGE_SIZE = 100
 
+
+def db_rows(offset: int = 0) -> list[tuple]:
+    """Fetch a table page as plain tuples; sqlite3.Row's by-name access does
+    a column scan per subscript, which adds up across N rows x 7 columns."""
+    with _borrow_reader() as conn:
+        cur = conn.execute(
+            """
+            SELECT id, image_path, title, description, submitted_by, approximate_date, created_at,
+                   thumb_path
+            FROM submissions
+            ORDER BY id DESC
+            LIMIT ? OFFSET ?
+            """,
+            (PAGE_SIZE, offset),
+        )
+        cur.row_factory = None
+        return cur.fetchall()
+
+
+# Rows are immutable except through update_submission, which clears this
+# cache (as does save_submission), so by-id lookups on the image-serving and
+# edit paths are usually a dict hit.
+@lru_cache(maxsize=1024)
 def db_row_by_id(submission_id: int) -> sqlite3.Row | None:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    row = conn.execute(
-        """
-        SELECT id, image_path, title, description, submitted_by, approximate_date, created_at
-        FROM submissions
-        WHERE id = ?
-        """,
-        (submission_id,),
-    ).fetchone()
-    conn.close()
-    return row
+    with _borrow_reader() as conn:
+        return conn.execute(
+            """
+            SELECT id, image_path, title, description, submitted_by, approximate_date, created_at,
+                   iptc_offset, iptc_len, content_hash, thumb_path
+            FROM submissions
+            WHERE id = ?
+            """,
+            (submission_id,),
+        ).fetchone()
+
+
+def db_id_by_hash(content_hash: str) -> int | None:
+    with _borrow_reader() as conn:
+        row = conn.execute(
+            "SELECT id FROM submissions WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+    return row["id"] if row else None
+
+
+_UTC = timezone.utc
+_CST = ZoneInfo("America/Chicago")
 
 
+# created_at strings are immutable once stored, so the formatted form can be
+# cached across renders instead of re-parsing per table row.
+@lru_cache(maxsize=4096)
 def format_submitted_time(value: str) -> str:
     try:
         dt = datetime.fromisoformat(value)
     except ValueError:
         return value
     if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    cst = ZoneInfo("America/Chicago")
-    return dt.astimezone(cst).strftime("%b %d %Y %I:%M %p CST")
+        dt = dt.replace(tzinfo=_UTC)
+    return dt.astimezone(_CST).strftime("%b %d %Y %I:%M %p CST")
 
 
+@lru_cache(maxsize=1024)
 def clip_text(value: str | None, limit: int = 40) -> str:
     text = value or ""
     if len(text) <= limit:
@@ -86,69 +243,223 @@ def clip_text(value: str | None, limit: int = 40) -> str:
     return f"{text[:limit - 3]}..."
 
 
-def write_image_file(
+def _make_thumbnail(image_path: str) -> str | None:
+    """Render a WebP thumbnail of the stored image for the submissions table,
+    so browsing never downloads or decodes the full-resolution originals.
+    Returns the thumbnail path, or None when the upload can't be decoded."""
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    thumb_path = os.path.join(THUMB_DIR_STR, f"{stem}.webp")
+    try:
+        with Image.open(image_path) as im:
+            im.thumbnail((THUMB_SIZE, THUMB_SIZE))
+            im.save(thumb_path, "WEBP", quality=75, method=6)
+    except (OSError, ValueError):
+        return None
+    return thumb_path
+
+
+def _remove_image(image_path: str, thumb_path: str | None) -> None:
+    os.remove(image_path)
+    if thumb_path:
+        os.remove(thumb_path)
+
+
+def _fsync_file(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+async def write_image_file(
     filename: str,
-    filebuffer: bytes,
+    photo: UploadFile,
     title: str | None,
     description: str | None,
     submitted_by: str | None,
-) -> Path:
-    suffix = Path(filename or "upload").suffix
-    stored_name = f"{uuid4().hex}{suffix}"
-    image_path = IMAGE_DIR / stored_name
-    with open(image_path, "wb") as fh:
-        fh.write(filebuffer)
-        fh.flush()
-        os.fsync(fh.fileno())
-
-    info = IPTCInfo(str(image_path), force=True)
-    if title:
-        info["object name"] = title
-    if description:
-        info["caption/abstract"] = description
-    if submitted_by:
-        info["source"] = submitted_by
-    info.save_as(str(image_path), {"overwrite": True})
-    return image_path
-
-
-def save_submission(
+) -> tuple[str, tuple[int, int] | None, str]:
+    # Plain string slicing; Path construction just to read .suffix is
+    # measurable overhead on the upload path.
+    dot = (filename or "").rfind(".")
+    suffix = filename[dot:] if dot >= 0 else ""
+    image_path = os.path.join(IMAGE_DIR_STR, f"{uuid4().hex}{suffix}")
+    # Copy the upload in chunks so a 20 MB photo never sits in memory whole
+    # and the network receive overlaps with the disk write. The IPTC segment
+    # is spliced into the first chunk on the way through, so the file is
+    # written exactly once instead of being rewritten for metadata. The raw
+    # upload bytes (pre-splice) are hashed as they stream past so duplicate
+    # uploads can be detected regardless of the metadata entered.
+    segment = iptc.build_app13_segment(title, description, submitted_by)
+    hasher = hashlib.blake2b(digest_size=16)
+    first = await photo.read(UPLOAD_CHUNK)
+    hasher.update(first)
+    spliced = iptc.splice_buffer(first, segment) if first else None
+    iptc_loc = None
+    # Buffer a full chunk per write(2) instead of the default 8 KiB, so a
+    # 20 MB upload costs ~20 syscalls rather than ~2500.
+    with open(image_path, "wb", buffering=UPLOAD_CHUNK) as fh:
+        if spliced:
+            prefix, iptc_loc = spliced
+            fh.write(prefix)
+        else:
+            fh.write(first)
+        while chunk := await photo.read(UPLOAD_CHUNK):
+            hasher.update(chunk)
+            fh.write(chunk)
+    if spliced is None and first[:2] == iptc.SOI:
+        # JPEG whose header didn't fit in the first chunk: patch after the fact.
+        iptc_loc = await asyncio.get_running_loop().run_in_executor(
+            _IO_POOL, iptc.patch_file, image_path, title, description, submitted_by
+        )
+    if DURABLE_UPLOADS:
+        # The disk barrier blocks only this request's worker thread, never
+        # the event loop serving everyone else.
+        await asyncio.get_running_loop().run_in_executor(
+            _IO_POOL, _fsync_file, image_path
+        )
+    return image_path, iptc_loc, hasher.hexdigest()
+
+
+async def save_submission(
     filename: str,
-    filebuffer: bytes,
+    photo: UploadFile,
     title: str | None,
     description: str | None,
     submitted_by: str | None,
     approximate_date: str | None,
-) -> None:
-    image_path = write_image_file(filename, filebuffer, title, description, submitted_by)
+) -> bool:
+    """Store one submission; returns False when the photo was a duplicate
+    of an existing submission and nothing was recorded."""
+    image_path, iptc_loc, content_hash = await write_image_file(
+        filename, photo, title, description, submitted_by
+    )
 
-    created_at = datetime.now(timezone.utc).isoformat()
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
+    if db_id_by_hash(content_hash) is not None:
+        # Same photo already submitted: drop the fresh copy and keep the
+        # existing submission rather than storing a duplicate. Checked
+        # before the thumbnail render so a duplicate costs no decode.
+        _remove_image(image_path, None)
+        return False
+
+    thumb_path = await asyncio.get_running_loop().run_in_executor(
+        _IO_POOL, _make_thumbnail, image_path
+    )
+    created_at = datetime.now(_UTC).isoformat(timespec="seconds")
+    iptc_offset, iptc_len = iptc_loc if iptc_loc else (None, None)
+    with _borrow_writer() as conn:
+        cur = conn.execute(
             """
             INSERT INTO submissions (
-                image_path, title, description, submitted_by, approximate_date, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?)
+                image_path, title, description, submitted_by, approximate_date, created_at,
+                iptc_offset, iptc_len, content_hash, thumb_path
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(content_hash) DO NOTHING
             """,
             (
-                str(image_path),
+                image_path,
                 title or "",
                 description or "",
                 submitted_by or "",
                 approximate_date or "",
                 created_at,
+                iptc_offset,
+                iptc_len,
+                content_hash,
+                thumb_path,
             ),
         )
+    if cur.rowcount == 0:
+        # Lost a race with a concurrent submit of the same photo: the unique
+        # index is the authority, the early hash check above just saves work.
+        _remove_image(image_path, thumb_path)
+        return False
+    db_row_by_id.cache_clear()
+    _invalidate_table()
+    return True
+
+
+async def save_submissions_batch(
+    photos: list[UploadFile],
+    title: str | None,
+    description: str | None,
+    submitted_by: str | None,
+    approximate_date: str | None,
+) -> int:
+    """Multi-photo ingest: write every file, then record all rows with one
+    executemany in a single transaction so the per-photo commit (and WAL
+    sync) cost is paid once for the whole batch. Returns how many photos
+    were skipped as duplicates."""
+    created_at = datetime.now(_UTC).isoformat(timespec="seconds")
+    entries = []
+    seen_hashes: set[str] = set()
+    duplicates = 0
+    for photo in photos:
+        image_path, iptc_loc, content_hash = await write_image_file(
+            photo.filename or "upload", photo, title, description, submitted_by
+        )
+        if content_hash in seen_hashes or db_id_by_hash(content_hash) is not None:
+            _remove_image(image_path, None)
+            duplicates += 1
+            continue
+        seen_hashes.add(content_hash)
+        thumb_path = await asyncio.get_running_loop().run_in_executor(
+            _IO_POOL, _make_thumbnail, image_path
+        )
+        iptc_offset, iptc_len = iptc_loc if iptc_loc else (None, None)
+        entries.append(
+            (
+                image_path,
+                title or "",
+                description or "",
+                submitted_by or "",
+                approximate_date or "",
+                created_at,
+                iptc_offset,
+                iptc_len,
+                content_hash,
+                thumb_path,
+            )
+        )
+    if not entries:
+        return duplicates
+    lost_races = []
+    with _borrow_writer() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for entry in entries:
+            # Row-at-a-time inside the one transaction (so the commit and
+            # WAL sync are still paid once) because a concurrent submit can
+            # land the same hash between our check and this insert; the
+            # conflict must skip that photo, not abort the whole batch.
+            cur = conn.execute(
+                """
+                INSERT INTO submissions (
+                    image_path, title, description, submitted_by, approximate_date, created_at,
+                    iptc_offset, iptc_len, content_hash, thumb_path
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO NOTHING
+                """,
+                entry,
+            )
+            if cur.rowcount == 0:
+                lost_races.append(entry)
+    for image_path, *_rest, thumb_path in lost_races:
+        _remove_image(image_path, thumb_path)
+        duplicates += 1
+    if len(lost_races) == len(entries):
+        return duplicates
+    db_row_by_id.cache_clear()
+    _invalidate_table()
+    return duplicates
 
 
-def update_submission(
+async def update_submission(
     image_id: int,
     title: str | None,
     description: str | None,
     submitted_by: str | None,
     approximate_date: str | None,
-    photo_filename: str | None = None,
-    photo_buffer: bytes | None = None,
+    photo: UploadFile | None = None,
 ) -> None:
     row = db_row_by_id(image_id)
     if not row:
@@ -156,34 +467,62 @@ def update_submission(
 
     image_path = Path(row["image_path"])
     new_image_path = None
-    if photo_filename and photo_buffer:
-        new_image_path = write_image_file(photo_filename, photo_buffer, title, description, submitted_by)
+    iptc_loc = (row["iptc_offset"], row["iptc_len"])
+    content_hash = row["content_hash"]
+    thumb_path = row["thumb_path"]
+    if photo is not None:
+        new_image_path, iptc_loc, content_hash = await write_image_file(
+            photo.filename or "upload", photo, title, description, submitted_by
+        )
+        thumb_path = await asyncio.get_running_loop().run_in_executor(
+            _IO_POOL, _make_thumbnail, new_image_path
+        )
+        iptc_loc = iptc_loc or (None, None)
+        existing_id = db_id_by_hash(content_hash)
+        if existing_id is not None and existing_id != image_id:
+            # Replacement matches another submission's photo; keep the file
+            # but don't claim its hash, the unique index belongs to that row.
+            content_hash = None
     elif image_path.exists():
-        info = IPTCInfo(str(image_path), force=True)
-        if title is not None:
-            info["object name"] = title
-        if description is not None:
-            info["caption/abstract"] = description
-        if submitted_by is not None:
-            info["source"] = submitted_by
-        info.save_as(str(image_path), {"overwrite": True})
-
-    with sqlite3.connect(DB_PATH) as conn:
+        # Patch the existing file, reusing the cached segment location so an
+        # unchanged-length edit is a single in-place write. The per-file lock
+        # keeps two concurrent edits of the same image from interleaving.
+        async with _file_lock(row["image_path"]):
+            iptc_loc = await asyncio.get_running_loop().run_in_executor(
+                _IO_POOL,
+                iptc.patch_file,
+                image_path,
+                title,
+                description,
+                submitted_by,
+                row["iptc_offset"],
+                row["iptc_len"],
+            ) or (None, None)
+
+    with _borrow_writer() as conn:
         conn.execute(
             """
             UPDATE submissions
-            SET image_path = ?, title = ?, description = ?, submitted_by = ?, approximate_date = ?
+            SET image_path = ?, title = ?, description = ?, submitted_by = ?, approximate_date = ?,
+                iptc_offset = ?, iptc_len = ?, content_hash = ?, thumb_path = ?
             WHERE id = ?
             """,
             (
-                str(new_image_path) if new_image_path else str(image_path),
+                new_image_path if new_image_path else str(image_path),
                 title or "",
                 description or "",
                 submitted_by or "",
                 approximate_date or "",
+                iptc_loc[0],
+                iptc_loc[1],
+                content_hash,
+                thumb_path,
                 image_id,
             ),
         )
+    db_row_by_id.cache_clear()
+    _image_urls.pop(image_id, None)
+    _invalidate_table()
 
 
 init_db()
@@ -212,6 +551,12 @@ app, rt = fast_app(
                         #photo {
                                 display: none;
                         }
+                        .table-wrap img {
+                                height: 3rem;
+                                width: auto;
+                                border-radius: 4px;
+                                display: block;
+                        }
                         .table-wrap {
                                 max-height: 320px;
                                 overflow-y: auto;
@@ -285,13 +630,88 @@ app, rt = fast_app(
         )
 )
 
-def submissions_table(rows: list[sqlite3.Row]):
+class _ImmutableStaticFiles(StaticFiles):
+    """StaticFiles that marks every hit as immutable. Safe here because the
+    stored files have uuid names: a given /images/ URL never changes content,
+    so browsers can skip even the conditional revalidation round trip."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+# uuid filenames make these URLs immutable, so StaticFiles can serve them
+# straight off disk with no per-hit database work. The mount goes at the
+# front of the router so fast_app's catch-all static route (rooted at the
+# project directory) doesn't shadow it.
+app.router.routes.insert(
+    0, Mount("/images", app=_ImmutableStaticFiles(directory=IMAGE_DIR), name="images")
+)
+
+
+# Stored images keep their uuid filenames, so their /images/ URLs are
+# immutable and cacheable; the URL for a submission only changes when update
+# replaces the photo, which drops the cached entry.
+_image_urls: dict[int, str] = {}
+
+
+def image_url(image_id: int, image_path: str) -> str:
+    url = _image_urls.get(image_id)
+    if url is None:
+        url = _image_urls[image_id] = f"/images/{os.path.basename(image_path)}"
+    return url
+
+
+def _thumb_url(image_id: int, thumb_path: str) -> str:
+    # /thumb responses are cached as immutable, so the per-upload uuid rides
+    # along as a version token and busts the cache when the photo is replaced.
+    return f"/thumb/{image_id}?v={os.path.basename(thumb_path)[:-5]}"
+
+
+def submission_rows(rows: list[tuple], offset: int = 0):
+    # Local bindings keep the comprehension on LOAD_FAST instead of module
+    # globals lookups; at a few hundred cells per page it adds up.
+    tr, td, img = Tr, Td, Img
+    fmt, clip, thumb = format_submitted_time, clip_text, _thumb_url
+    trs = [
+        tr(
+            td(img(src=thumb(row_id, thumb_path), alt="", loading="lazy") if thumb_path else ""),
+            td(fmt(created_at)),
+            td(clip(title)),
+            td(clip(description)),
+            td(submitted_by),
+            td(approximate_date),
+            hx_get=form_partial.to(image_id=row_id),
+            hx_target="#form-panel",
+            hx_swap="outerHTML",
+            hx_push_url=f"/?image_id={row_id}",
+            style="cursor: pointer;",
+        )
+        for row_id, _image_path, title, description, submitted_by, approximate_date, created_at, thumb_path in rows
+    ]
+    if len(rows) == PAGE_SIZE:
+        # A full page means there may be more; this placeholder row swaps
+        # itself for the next page when scrolled into view.
+        trs.append(
+            Tr(
+                Td("Loading more…", colspan="6"),
+                hx_get=table_partial.to(offset=offset + PAGE_SIZE),
+                hx_trigger="revealed",
+                hx_swap="outerHTML",
+            )
+        )
+    return trs
+
+
+def submissions_table(rows: list[tuple]):
     return Div(
         H2("Previous submissions"),
         Div(
             Table(
                 Thead(
                     Tr(
+                        Th("Photo"),
                         Th("Submitted"),
                         Th("Title"),
                         Th("Description"),
@@ -299,23 +719,7 @@ def submissions_table(rows: list[sqlite3.Row]):
                         Th("Approximate Date"),
                     )
                 ),
-                Tbody(
-                    *[
-                        Tr(
-                            Td(format_submitted_time(row["created_at"])),
-                            Td(clip_text(row["title"])),
-                            Td(clip_text(row["description"])),
-                            Td(row["submitted_by"]),
-                            Td(row["approximate_date"]),
-                            hx_get=form_partial.to(image_id=row["id"]),
-                            hx_target="#form-panel",
-                            hx_swap="outerHTML",
-                            hx_push_url=f"/?image_id={row['id']}",
-                            style="cursor: pointer;",
-                        )
-                        for row in rows
-                    ]
-                ),
+                Tbody(*submission_rows(rows)),
             ),
             cls="table-wrap",
         ),
@@ -329,8 +733,8 @@ def notice_panel(message: str | None, *, oob: bool = False):
     return Div(P(message) if message else "", **attrs)
 
 
-def form_panel(
-    edit_row: sqlite3.Row | None,
+def _build_form_panel(
+    edit_row,
     image_src: str,
     image_exists: bool,
     *,
@@ -406,29 +810,88 @@ def form_panel(
     return Div(form, notice_panel(missing_notice), **attrs)
 
 
-def table_panel(rows: list[sqlite3.Row], *, oob: bool = False):
+# The form markup is identical from request to request except for the handful
+# of field values, so each variant (new vs edit, image preview or not) is
+# rendered to HTML once with placeholder tokens and re-served with the values
+# substituted in. NUL bytes can't occur in form data, so the tokens never
+# collide with real content and survive to_xml's attribute escaping intact.
+_FORM_FIELDS = ("id", "title", "description", "approximate_date", "submitted_by")
+_FORM_TOKENS = {name: f"\x00{name}\x00" for name in _FORM_FIELDS}
+_SRC_TOKEN = "\x00src\x00"
+_form_templates: dict[tuple[bool, bool, bool, bool], str] = {}
+
+
+def form_panel(
+    edit_row: sqlite3.Row | None,
+    image_src: str,
+    image_exists: bool,
+    *,
+    oob: bool = False,
+):
+    is_edit = edit_row is not None
+    key = (is_edit, bool(image_src), image_exists, oob)
+    template = _form_templates.get(key)
+    if template is None:
+        fake_row = dict(_FORM_TOKENS) if is_edit else None
+        fake_src = _SRC_TOKEN if image_src else ""
+        template = to_xml(_build_form_panel(fake_row, fake_src, image_exists, oob=oob))
+        _form_templates[key] = template
+    if not is_edit:
+        return NotStr(template)
+    html = template
+    for name, token in _FORM_TOKENS.items():
+        html = html.replace(token, escape(str(edit_row[name] or ""), quote=True))
+    if image_src:
+        html = html.replace(_SRC_TOKEN, escape(image_src, quote=True))
+    return NotStr(html)
+
+
+# The table only changes when a submission is saved or updated, so the
+# rendered HTML is cached and re-served verbatim until a write bumps the
+# version.
+_table_version = 0
+_table_cache: tuple[int, str] | None = None
+
+
+def _invalidate_table() -> None:
+    global _table_version
+    _table_version += 1
+
+
+def table_panel(*, oob: bool = False):
+    global _table_cache
     attrs = {"id": "table-panel"}
     if oob:
         attrs["hx-swap-oob"] = "true"
-    return Div(submissions_table(rows), **attrs)
+    if _table_cache is None or _table_cache[0] != _table_version:
+        _table_cache = (_table_version, to_xml(submissions_table(db_rows())))
+    return Div(NotStr(_table_cache[1]), **attrs)
 
 
-@rt
-def index(image_id: int | None = None):
-    rows = db_rows()
+def _edit_context(image_id: int | None) -> tuple[sqlite3.Row | None, str, bool]:
+    """Resolve the row being edited plus its preview URL in one query."""
     edit_row = db_row_by_id(image_id) if image_id else None
     image_exists = False
     image_src = ""
     if edit_row:
-        image_path = Path(edit_row["image_path"])
-        image_exists = image_path.exists()
+        image_exists = Path(edit_row["image_path"]).exists()
         if image_exists:
-            image_src = image_by_id.to(image_id=edit_row["id"])
+            image_src = image_url(edit_row["id"], edit_row["image_path"])
+    return edit_row, image_src, image_exists
+
+
+# Read routes run their DB queries (and any cache-miss render) in a thread so
+# they never block the event loop; with the WAL reader pool the threads read
+# in parallel instead of queueing behind each other.
+@rt
+async def index(image_id: int | None = None):
+    edit_row, image_src, image_exists = await asyncio.to_thread(_edit_context, image_id)
+    table = await asyncio.to_thread(table_panel)
     return Titled(
         APP_TITLE,
         Div(
             form_panel(edit_row, image_src, image_exists),
-            table_panel(rows),
+            table,
             cls="container",
             hx_boost="true",
         ),
@@ -441,21 +904,16 @@ def edit(image_id: int):
 
 
 @rt("/partials/form")
-def form_partial(image_id: int | None = None):
-    edit_row = db_row_by_id(image_id) if image_id else None
-    image_exists = False
-    image_src = ""
-    if edit_row:
-        image_path = Path(edit_row["image_path"])
-        image_exists = image_path.exists()
-        if image_exists:
-            image_src = image_by_id.to(image_id=edit_row["id"])
-    return form_panel(edit_row, image_src, image_exists)
+async def form_partial(image_id: int | None = None):
+    return form_panel(*await asyncio.to_thread(_edit_context, image_id))
 
 
 @rt("/partials/table")
-def table_partial():
-    return table_panel(db_rows())
+async def table_partial(offset: int = 0):
+    if offset:
+        rows = await asyncio.to_thread(db_rows, offset)
+        return tuple(submission_rows(rows, offset))
+    return await asyncio.to_thread(table_panel)
 
 
 @rt
@@ -467,14 +925,43 @@ async def submit(
     approximate_date: str | None = None,
     submitted_by: str | None = None,
 ):
-    filebuffer = await photo.read()
+    saved = await save_submission(
+        photo.filename or "upload", photo, title, description, submitted_by, approximate_date
+    )
     await photo.close()
-    save_submission(photo.filename or "upload", filebuffer, title, description, submitted_by, approximate_date)
     if "hx-request" not in request.headers:
         return RedirectResponse(url="/", status_code=303)
+    notice = None if saved else "That photo was already submitted; kept the existing entry."
+    return Div(
+        form_panel(None, "", False, oob=True),
+        table_panel(oob=True),
+        notice_panel(notice, oob=True),
+    )
+
+
+@rt
+async def submit_batch(
+    request: Request,
+    photos: list[UploadFile],
+    title: str | None = None,
+    description: str | None = None,
+    approximate_date: str | None = None,
+    submitted_by: str | None = None,
+):
+    skipped = await save_submissions_batch(photos, title, description, submitted_by, approximate_date)
+    for photo in photos:
+        await photo.close()
+    if "hx-request" not in request.headers:
+        return RedirectResponse(url="/", status_code=303)
+    notice = (
+        f"Skipped {skipped} already-submitted photo{'s' if skipped != 1 else ''}."
+        if skipped
+        else None
+    )
     return Div(
         form_panel(None, "", False, oob=True),
-        table_panel(db_rows(), oob=True),
+        table_panel(oob=True),
+        notice_panel(notice, oob=True),
     )
 
 
@@ -488,41 +975,59 @@ async def update(
     approximate_date: str | None = None,
     submitted_by: str | None = None,
 ):
-    photo_filename = None
-    photo_buffer = None
+    new_photo = None
     if photo and photo.filename:
-        photo_buffer = await photo.read()
-        await photo.close()
-        if photo_buffer:
-            photo_filename = photo.filename or "upload"
-        else:
-            photo_buffer = None
-    update_submission(
+        # Peek one byte to tell an empty file field from a real replacement,
+        # then rewind so the streaming copy sees the whole upload.
+        if await photo.read(1):
+            await photo.seek(0)
+            new_photo = photo
+    await update_submission(
         image_id,
         title,
         description,
         submitted_by,
         approximate_date,
-        photo_filename,
-        photo_buffer,
+        new_photo,
     )
+    # An empty multipart field (e.g. photo=) arrives as a plain str, not an
+    # UploadFile, and has nothing to close.
+    if isinstance(photo, UploadFile):
+        await photo.close()
     if "hx-request" not in request.headers:
         return RedirectResponse(url="/", status_code=303)
     return Div(
         form_panel(None, "", False, oob=True),
-        table_panel(db_rows(), oob=True),
+        table_panel(oob=True),
     )
 
 
 @rt("/image/{image_id}")
-def image_by_id(image_id: int):
-    row = db_row_by_id(image_id)
+async def image_by_id(image_id: int):
+    row = await asyncio.to_thread(db_row_by_id, image_id)
     if not row:
         return RedirectResponse(url="/", status_code=302)
     image_path = Path(row["image_path"])
     if not image_path.exists():
         return RedirectResponse(url="/", status_code=302)
-    return FileResponse(image_path)
+    return FileResponse(
+        image_path, headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+@rt("/thumb/{image_id}")
+async def thumb_by_id(image_id: int, v: str | None = None):
+    row = await asyncio.to_thread(db_row_by_id, image_id)
+    if not row:
+        return RedirectResponse(url="/", status_code=302)
+    thumb_path = row["thumb_path"]
+    if not thumb_path or not Path(thumb_path).exists():
+        # Rows from before thumbnailing (or undecodable files) fall back to
+        # serving the original.
+        return await image_by_id(image_id)
+    return FileResponse(
+        thumb_path, headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
 
 
 serve()
@@ -1,48 +1,289 @@
+import functools
+import glob
+import hashlib
+import mmap
 import os
+import pickle
 import sys
-from  iptcinfo3 import IPTCInfo
+from concurrent.futures import ProcessPoolExecutor
+from struct import pack
 
-# print("sys arg1:", sys.argv[1])
-# filename = os.path.basename(sys.argv[1])
-filename = "/mnt/d/Dropbox/McCallieFamilyStories/Zoomfest-Feb2025/Zoom Feb 16/allison IMG_2286_xmp.jpg"
+from iptcinfo3 import IPTCData, IPTCInfo, c_datasets, collect_adobe_parts
 
-info = IPTCInfo(filename)
-# print("info:", info)
-for k, v in info._data.items():
-	print("key:", k, "value:", v)
+# The Photoshop IRB holding the IPTC IIM data, as it appears in the APP13
+# segment: preamble plus the 8BIM resource id 0x0404.
+IIM_SIGNATURE = b'Photoshop 3.0\x008BIM\x04\x04'
 
-print("Title:", info['object name'])
-print("Caption/Abstract:", info['caption/abstract'])
-print("Keywords:", info['keywords'])
-print("Byline:", info['by-line'])
-print("Credit:", info['credit'])
-print("Source:", info['source'])	
 
-# now set some values
-# 'object name' shows up as Title in PS, presumably LR
-info['object name'] = "New Title via object name field"
+# Every info[...] read or write resolves its key through
+# IPTCData._key_as_int, re-running the isinstance/.lower() cascade each
+# time. The key space is tiny and immutable, so resolve each name once.
+_orig_key_as_int = IPTCData._key_as_int
+name_to_tag = functools.cache(_orig_key_as_int)
+IPTCData._key_as_int = classmethod(lambda cls, key: name_to_tag(key))
 
-# shows up as Headline in PS, presumably LR
-info['headline'] = "New Headline via headline field"
 
-# info['title'] = DOES NOT WORK "New Title using title field"
-# caption/abstract shows up in Description field in PS, presumably LR 
-info['caption/abstract'] = "This is a new caption/abstract set via caption/abstract field."
+def copy_range(src_fd, dst_fd, offset, count):
+	"""Append count bytes of src_fd starting at offset to dst_fd via
+	sendfile, so the image data never passes through Python buffers."""
+	while count > 0:
+		try:
+			sent = os.sendfile(dst_fd, src_fd, offset, count)
+		except OSError:
+			# No sendfile between regular files on this platform.
+			sent = os.write(dst_fd, os.pread(src_fd, min(count, 1 << 20), offset))
+		if sent == 0:
+			raise OSError(f'short copy at offset {offset}')
+		offset += sent
+		count -= sent
 
-# info['Description'] = "This is a new description set via python  Description field."
 
-# keywords works
-info['keywords'] = ['keyword1', 'keyword2', 'keyword3']
+class FastIPTCInfo(IPTCInfo):
+	"""IPTCInfo whose load path finds the IPTC block with one vectorized
+	bytes.find over the file instead of iptcinfo3's read(1) marker walk.
+	bytes.find runs at memchr speed, so the scan cost is bounded by memory
+	bandwidth rather than Python bytecode dispatch per byte."""
 
-# don't use this one
-info['by-line'] = "John Doe"
+	# Where the enclosing APP13 segment sits in the source file, recorded by
+	# the scan so the save path can reuse it without re-walking the markers.
+	_app13_off = None
+	_app13_len = None
 
-# works
-info['source'] = "John Doe Studio"	
+	def scanToFirstIMMTag(self, fh):
+		# Map the file instead of streaming read() copies: pages come
+		# straight from the OS page cache (so RSS stays flat, replacing
+		# the earlier 1 KiB rolling window) and mm.find still runs at
+		# memchr speed over the mapping with zero copies.
+		try:
+			mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+		except (ValueError, OSError):  # empty file, pipe, ...
+			return None
+		try:
+			pos = mm.find(IIM_SIGNATURE)
+			if pos < 0:
+				return None
+			# The signature opens the segment data, so the APP13 marker and
+			# its length sit in the four bytes just before it.
+			if pos >= 4 and mm[pos - 4:pos - 2] == b'\xff\xed':
+				self._app13_off = pos - 4
+				self._app13_len = 2 + int.from_bytes(mm[pos - 2:pos])
+			# Skip the rest of the 8BIM resource header: a Pascal-style
+			# name padded to even length, then the 4-byte data length.
+			p = pos + len(IIM_SIGNATURE)
+			namelen = mm[p]
+			p += 1 + namelen + (1 + namelen) % 2
+			reslen = int.from_bytes(mm[p:p + 4])
+			p += 4
+		finally:
+			mm.close()
+		# Hand off to the stock record parser, positioned on the first tag.
+		fh.seek(p)
+		offset = self.blindScan(fh, MAX=reslen)
+		# blindScan reports the offset it found the tag at, which is 0 here
+		# (falsy!) when the IIM block has no leading charset record.
+		return offset is not False and offset is not None
 
-# use save as to write changes to a new file
-new_filename = "/mnt/d/Dropbox/McCallieFamilyStories/Zoomfest-Feb2025/Zoom Feb 16/allison IMG_2286_xmp_modified.jpg"
-info.save_as(new_filename)
-print(f"Modified IPTC data saved to {new_filename}")	
+	def update(self, mapping):
+		"""Set several fields in one pass. Each info[...] = value goes
+		through IPTCData.__setitem__'s per-key type dispatch; here the
+		name->tag resolution is bound once and the values land with plain
+		dict stores."""
+		data = self._data
+		for name, value in mapping.items():
+			dict.__setitem__(data, name_to_tag(name), value)
 
+	def packedIIMData(self):
+		"""Serialize _data into IIM bytes through one growing bytearray.
+		bytearray += resizes with geometric overallocation, so the whole
+		block is built linearly with a single final copy, versus
+		upstream's list-of-chunks plus b''.join and its NaN/legacy-type
+		special cases per dataset."""
+		out = bytearray()
+		out += pack('!BBBHH', 0x1c, 2, 0, 2, 4)  # record version dataset
+		for dataset, value in self._data.items():
+			if value is None or (hasattr(value, '__len__') and len(value) == 0):
+				continue
+			if not isinstance(dataset, int) or dataset not in c_datasets:
+				continue
+			if isinstance(value, (int, float)):
+				value = str(value)
+			value = self._enc(value)
+			if isinstance(value, list):
+				seen = set()
+				for v in map(bytes, value):
+					if not v or v in seen:
+						continue
+					seen.add(v)
+					out += pack('!BBBH', 0x1c, 2, dataset, len(v))
+					out += v
+			else:
+				value = bytes(value)
+				out += pack('!BBBH', 0x1c, 2, dataset, len(value))
+				out += value
+		return bytes(out)
 
+	def save_as(self, newfile, options=None):
+		"""Single-pass rewrite. iptcinfo3's save_as re-parses the whole
+		file and buffers every segment in Python; this emits head, rebuilt
+		APP13 (keeping any non-IIM Photoshop resources in it), and tail as
+		three fd-to-fd transfers using the segment location the scan
+		recorded. Instances without that location (restored from the
+		pickle cache, or files with no APP13 yet) walk the markers once."""
+		with open(self._filename, 'rb') as src:
+			src_fd = src.fileno()
+			size = os.fstat(src_fd).st_size
+			if src.read(2) != b'\xff\xd8':
+				print(f'{self._filename} is not a Jpeg, not saved')
+				return None
+			# Trust the cached offset only if an APP13 header of the
+			# recorded length is still there.
+			off, seglen = self._app13_off, self._app13_len
+			header = os.pread(src_fd, 4, off) if off is not None else b''
+			if not (header[:2] == b'\xff\xed' and 2 + int.from_bytes(header[2:4]) == seglen):
+				off = seglen = None
+			tmpfile = newfile + '.tmp'
+			with open(tmpfile, 'wb', buffering=0) as dst:
+				dst_fd = dst.fileno()
+				if off is not None:
+					copy_range(src_fd, dst_fd, 0, off)
+					partdata = os.pread(src_fd, seglen - 4, off + 4)
+					dst.write(self.photoshopIIMBlock(collect_adobe_parts(partdata), self.packedIIMData()))
+					# everything after the old APP13, in one looping sendfile
+					copy_range(src_fd, dst_fd, off + seglen, size - off - seglen)
+				else:
+					self._rewrite_segments(src_fd, dst, size)
+		os.replace(tmpfile, newfile)
+		return True
+
+	def _rewrite_segments(self, src_fd, dst, size):
+		"""Marker-walk fallback for save_as: pipe non-APP13 segments
+		through fd-to-fd and swap in the rebuilt APP13 along the way."""
+		dst_fd = dst.fileno()
+		dst.write(b'\xff\xd8')
+		pos = 2
+		wrote_iptc = False
+		while pos + 4 <= size:
+			header = os.pread(src_fd, 4, pos)
+			if header[0] != 0xff:
+				break
+			marker = header[1]
+			if marker == 0xff:  # padding byte
+				pos += 1
+				continue
+			if marker in (0xda, 0xd9):  # SOS / EOI: segments end here
+				if not wrote_iptc:
+					dst.write(self.photoshopIIMBlock(b'', self.packedIIMData()))
+				copy_range(src_fd, dst_fd, pos, size - pos)
+				break
+			seglen = 2 + int.from_bytes(header[2:4])
+			if marker == 0xed and not wrote_iptc:
+				# Rebuild APP13 around the fresh IIM data, carrying over
+				# the other Adobe resource blocks untouched.
+				partdata = os.pread(src_fd, seglen - 4, pos + 4)
+				dst.write(self.photoshopIIMBlock(collect_adobe_parts(partdata), self.packedIIMData()))
+				wrote_iptc = True
+			else:
+				copy_range(src_fd, dst_fd, pos, seglen)
+			pos += seglen
+
+
+# Parsed IPTC is cached across runs keyed on (path, mtime, size), so batch
+# passes over an unchanged directory skip the marker scan entirely.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'iptcinfo')
+
+
+def _cache_file(filename, st):
+	key = f'{os.path.abspath(filename)}\x00{st.st_mtime_ns}\x00{st.st_size}'
+	return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + '.pkl')
+
+
+def _write_cache(filename, info):
+	os.makedirs(CACHE_DIR, exist_ok=True)
+	path = _cache_file(filename, os.stat(filename))
+	tmppath = path + '.tmp'
+	with open(tmppath, 'wb') as fh:
+		pickle.dump((info._data, info.inp_charset), fh, protocol=5)
+	os.replace(tmppath, path)
+
+
+def cached_iptc(filename):
+	"""FastIPTCInfo for filename, skipping the parse when an unchanged file
+	was seen by an earlier run: a hit costs one stat plus a pickle load.
+	Any edit to the file changes mtime/size and so misses naturally."""
+	try:
+		with open(_cache_file(filename, os.stat(filename)), 'rb') as fh:
+			data, charset = pickle.load(fh)
+	except (OSError, pickle.PickleError, EOFError):
+		info = FastIPTCInfo(filename)
+		_write_cache(filename, info)
+		return info
+	info = FastIPTCInfo.__new__(FastIPTCInfo)
+	info._data = data
+	info._fobj = info._filename = filename
+	info._force = False
+	info.inp_charset = info.out_charset = charset
+	return info
+
+
+DEFAULT_PATH = "/mnt/d/Dropbox/McCallieFamilyStories/Zoomfest-Feb2025/Zoom Feb 16/allison IMG_2286_xmp.jpg"
+
+
+def process(filename):
+	"""Dump, rewrite, and save one file; returns the _modified path."""
+	info = cached_iptc(filename)
+	# print("info:", info)
+	# one preformatted write instead of a print (and a write syscall) per record
+	sys.stdout.write('\n'.join(f"key: {k} value: {v}" for k, v in info._data.items()) + '\n')
+
+	# read the fields of interest once, emit the report as a single write
+	vals = {k: info[k] for k in ('object name', 'caption/abstract', 'keywords', 'by-line', 'credit', 'source')}
+	sys.stdout.write(
+		f"Title: {vals['object name']}\n"
+		f"Caption/Abstract: {vals['caption/abstract']}\n"
+		f"Keywords: {vals['keywords']}\n"
+		f"Byline: {vals['by-line']}\n"
+		f"Credit: {vals['credit']}\n"
+		f"Source: {vals['source']}\n"
+	)
+
+	# now set some values, in one bulk update
+	# 'object name' shows up as Title in PS, presumably LR
+	# 'headline' shows up as Headline in PS, presumably LR
+	# caption/abstract shows up in Description field in PS, presumably LR
+	# info['title'] = DOES NOT WORK "New Title using title field"
+	# info['Description'] = DOES NOT WORK either
+	info.update({
+		'object name': "New Title via object name field",
+		'headline': "New Headline via headline field",
+		'caption/abstract': "This is a new caption/abstract set via caption/abstract field.",
+		'keywords': ['keyword1', 'keyword2', 'keyword3'],  # keywords works
+		'by-line': "John Doe",  # don't use this one
+		'source': "John Doe Studio",  # works
+	})
+
+	# use save as to write changes to a new file
+	root, ext = os.path.splitext(filename)
+	new_filename = f"{root}_modified{ext}"
+	info.save_as(new_filename)
+	# prime the cache so a follow-up read of the new file skips the parse too
+	_write_cache(new_filename, info)
+	print(f"Modified IPTC data saved to {new_filename}")
+	return new_filename
+
+
+if __name__ == '__main__':
+	# print("sys arg1:", sys.argv[1])
+	# filename = os.path.basename(sys.argv[1])
+	target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+	if os.path.isdir(target):
+		# Batch mode: every file is independent, so fan the directory out
+		# across cores; chunksize amortizes the per-task pickling round trip.
+		jpegs = sorted(
+			p for pat in ('*.jpg', '*.jpeg')
+			for p in glob.glob(os.path.join(target, pat))
+			if '_modified' not in os.path.basename(p)
+		)
+		with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+			list(ex.map(process, jpegs, chunksize=8))
+	else:
+		process(target)